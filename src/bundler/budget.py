@@ -0,0 +1,65 @@
+# src/bundler/budget.py (Deadline and byte limits for a bundling run)
+import time
+from .config import MAX_REPORT_ENTRIES
+
+class ScanBudget:
+    """
+    Tracks the wall-clock and byte limits for a single bundling run.
+    Once either limit is hit the budget stays exhausted, and callers are
+    expected to stop work and record what they left behind.
+    A byte_budget of None or 0 means no byte limit.
+    """
+    def __init__(self, time_budget_seconds=None, byte_budget=None):
+        self.deadline = time.monotonic() + time_budget_seconds if time_budget_seconds is not None else None
+        self.byte_budget = byte_budget or None
+        self.bytes_scanned = 0
+        self.exhausted_reason = None
+        self.unexplored_dirs = []
+        self.partially_explored_dirs = []
+        self.omitted_files = []
+
+    def is_past_deadline(self):
+        """Returns True once the time budget has run out."""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.exhausted_reason = self.exhausted_reason or "time budget"
+            return True
+        return False
+
+    def is_exhausted(self):
+        """Returns True once the deadline has passed or the byte budget is used up."""
+        return self.is_past_deadline() or self.exhausted_reason is not None
+
+    def charge(self, nbytes):
+        """
+        Accounts for nbytes of scanned content. Returns False if those bytes
+        don't fit in the remaining byte budget, in which case the caller should
+        skip that file and carry on; the budget is only exhausted once used up.
+        """
+        if self.byte_budget is not None and self.bytes_scanned + nbytes > self.byte_budget:
+            return False
+        self.bytes_scanned += nbytes
+        if self.byte_budget is not None and self.bytes_scanned >= self.byte_budget:
+            self.exhausted_reason = "scan byte budget"
+        return True
+
+    def report(self):
+        """
+        Summarises what the run skipped. Returns None if nothing was left out.
+        The reason is None if files were skipped but no limit was fully used.
+        """
+        if self.exhausted_reason is None and not self.omitted_files:
+            return None
+
+        def capped(paths):
+            paths = sorted(paths)
+            if len(paths) > MAX_REPORT_ENTRIES:
+                return paths[:MAX_REPORT_ENTRIES] + [f"... and {len(paths) - MAX_REPORT_ENTRIES} more"]
+            return paths
+
+        return {
+            "reason": self.exhausted_reason,
+            "bytesScanned": self.bytes_scanned,
+            "unexploredDirectories": capped(self.unexplored_dirs),
+            "partiallyExploredDirectories": capped(self.partially_explored_dirs),
+            "omittedFiles": capped(self.omitted_files),
+        }
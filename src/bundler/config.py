@@ -5,6 +5,9 @@ MAX_TOTAL_FILES = 10000
 MAX_TOTAL_SIZE_MB = 500
 MAX_DIRECTORY_DEPTH = 20
 
+# Longest list of skipped paths shown per section of a scan report.
+MAX_REPORT_ENTRIES = 50
+
 # --- File Handling ---
 
 # A set of common license filenames. These will be included in the
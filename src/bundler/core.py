@@ -1,16 +1,20 @@
 # src/bundler/core.py (Final version with license identification)
 import os
 import json
+from .budget import ScanBudget
 from .file_handler import get_all_files
 from .utils import generate_file_tree
 from .config import LICENSE_FILENAMES, LICENSE_FINGERPRINTS
 
-def bundle_project(project_path, include_patterns, exclude_patterns, focus_patterns, target_size_bytes, max_files, max_depth, output_format='txt'):
+def bundle_project(project_path, include_patterns, exclude_patterns, focus_patterns, target_size_bytes, max_files, max_depth, output_format='txt', time_budget_seconds=None, scan_byte_budget=None):
     """
     Orchestrates bundling, now with license identification.
+    If the time or scan byte budget runs out, the best bundle found so far is
+    returned along with a report of what was left out.
     """
     project_path = os.path.abspath(project_path)
     project_name = os.path.basename(project_path)
+    budget = ScanBudget(time_budget_seconds, scan_byte_budget)
     
     culled_file_info = get_all_files(
         root_dir=project_path,
@@ -19,7 +23,8 @@ def bundle_project(project_path, include_patterns, exclude_patterns, focus_patte
         focus_patterns=focus_patterns,
         target_size_bytes=target_size_bytes,
         max_files=max_files,
-        max_depth=max_depth
+        max_depth=max_depth,
+        budget=budget
     )
     
     file_paths_for_tree = [info["path"] for info in culled_file_info]
@@ -35,6 +40,11 @@ def bundle_project(project_path, include_patterns, exclude_patterns, focus_patte
 
         if info["is_binary"]:
             return "[Binary file content omitted]"
+
+        # Files are read in priority order, so past the deadline only the least important are dropped
+        if budget.is_past_deadline():
+            budget.omitted_files.append(relative_path)
+            return "[Content omitted: time budget exhausted]"
         
         # Read the file to check for license fingerprints or get full content
         try:
@@ -66,6 +76,9 @@ def bundle_project(project_path, include_patterns, exclude_patterns, focus_patte
             "fileTree": file_tree,
             "files": file_objects
         }
+        scan_report = budget.report()
+        if scan_report:
+            output_data["scanReport"] = scan_report
         return output_data
 
     # --- TXT Output Generation ---
@@ -86,4 +99,20 @@ def bundle_project(project_path, include_patterns, exclude_patterns, focus_patte
         output_content.append(header)
         output_content.append(content)
 
+    scan_report = budget.report()
+    if scan_report:
+        output_content.append("\n" * 2)
+        output_content.append("# Scan Report")
+        output_content.append("=" * 20)
+        if scan_report["reason"]:
+            output_content.append(f"Stopped early: {scan_report['reason']} exhausted after scanning {scan_report['bytesScanned']} bytes.")
+        else:
+            output_content.append(f"Scanned {scan_report['bytesScanned']} bytes; some files did not fit in the scan byte budget.")
+        output_content.append("Unexplored directories:")
+        output_content.extend(f"- {path}" for path in scan_report["unexploredDirectories"])
+        output_content.append("Partially explored directories:")
+        output_content.extend(f"- {path}" for path in scan_report["partiallyExploredDirectories"])
+        output_content.append("Omitted files:")
+        output_content.extend(f"- {path}" for path in scan_report["omittedFiles"])
+
     return "\n".join(output_content)
\ No newline at end of file
@@ -1,8 +1,11 @@
 # src/bundler/file_handler.py (With binary detection)
 import os
+import re
+import heapq
 from pathspec import PathSpec
+from .budget import ScanBudget
 from .config import GLOBAL_IGNORE_PATTERNS
-from .heuristics import calculate_importance_score
+from .heuristics import calculate_importance_score, calculate_directory_score
 
 def is_binary_file(filepath, chunk_size=1024):
     """
@@ -16,52 +19,118 @@ def is_binary_file(filepath, chunk_size=1024):
     except IOError:
         return True # Can't read, treat as binary/inaccessible
 
-def load_gitignore_patterns(root_path):
-    """Finds all .gitignore files and parses their patterns."""
-    gitignore_patterns = set()
-    for dirpath, _, filenames in os.walk(root_path):
-        if '.gitignore' in filenames:
-            gitignore_path = os.path.join(dirpath, '.gitignore')
-            try:
-                with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    for line in f:
-                        stripped_line = line.strip()
-                        if stripped_line and not stripped_line.startswith('#'):
-                            # Patterns in sub-gitignores are relative to that directory
-                            relative_pattern_dir = os.path.relpath(dirpath, root_path)
-                            if relative_pattern_dir == '.':
-                                gitignore_patterns.add(stripped_line)
-                            else:
-                                pattern = os.path.join(relative_pattern_dir, stripped_line).replace(os.sep, '/')
-                                gitignore_patterns.add(pattern)
-            except Exception as e:
-                print(f"Warning: Could not read or parse {gitignore_path}: {e}")
+def load_gitignore_patterns(root_path, dirpath):
+    """
+    Parses the .gitignore in dirpath, if any. Patterns are returned in file
+    order (negations depend on it) and relative to root_path, since patterns
+    in sub-gitignores only apply to that directory.
+    """
+    gitignore_patterns = []
+    gitignore_path = os.path.join(dirpath, '.gitignore')
+    relative_pattern_dir = os.path.relpath(dirpath, root_path)
+    try:
+        with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                stripped_line = line.strip()
+                if stripped_line and not stripped_line.startswith('#'):
+                    if relative_pattern_dir == '.':
+                        gitignore_patterns.append(stripped_line)
+                    else:
+                        negation = '!' if stripped_line.startswith('!') else ''
+                        pattern = os.path.join(relative_pattern_dir, stripped_line[len(negation):]).replace(os.sep, '/')
+                        gitignore_patterns.append(negation + pattern)
+    except Exception as e:
+        print(f"Warning: Could not read or parse {gitignore_path}: {e}")
     return gitignore_patterns
 
-def get_all_files(root_dir, include_patterns, exclude_patterns, focus_patterns, target_size_bytes, max_files, max_depth):
+def patterns_may_match_under(patterns, relative_dir):
+    """
+    Conservatively checks whether any pattern could match a file inside
+    relative_dir. Used to decide if an excluded directory can be skipped,
+    since --include and negated exclude patterns can re-add files from it.
+    """
+    dir_prefix = relative_dir + '/'
+    for pattern in patterns:
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith(('#', '!')):
+            continue
+        # Unanchored patterns without an inner slash (e.g. "*.js") match at any depth
+        if '/' not in pattern.rstrip('/') or pattern.startswith('**'):
+            return True
+        pattern = pattern.lstrip('/')
+        literal_prefix = re.split(r'[*?\[]', pattern, maxsplit=1)[0]
+        if literal_prefix.startswith(dir_prefix) or dir_prefix.startswith(literal_prefix):
+            return True
+    return False
+
+def get_all_files(root_dir, include_patterns, exclude_patterns, focus_patterns, target_size_bytes, max_files, max_depth, budget=None):
     """
     Finds all valid files, scores them, and culls the list based on limits.
     Now returns a list of dictionaries with file metadata.
+
+    Directories are scanned best-first by their DIR_SCORES priority, so if the
+    budget runs out the files found so far are the most important ones. What
+    was left unscanned is recorded on the budget.
     """
     abs_root_dir = os.path.abspath(root_dir)
+    if budget is None:
+        budget = ScanBudget()
     
-    project_gitignore_patterns = load_gitignore_patterns(abs_root_dir)
-    all_exclude_patterns = set(GLOBAL_IGNORE_PATTERNS) | set(exclude_patterns) | project_gitignore_patterns
+    # Kept in order, since a negated pattern only overrides the patterns before it
+    all_exclude_patterns = list(dict.fromkeys(GLOBAL_IGNORE_PATTERNS + list(exclude_patterns)))
     
     include_spec = PathSpec.from_lines('gitwildmatch', include_patterns) if include_patterns else None
     exclude_spec = PathSpec.from_lines('gitwildmatch', all_exclude_patterns)
     focus_spec = PathSpec.from_lines('gitwildmatch', focus_patterns) if focus_patterns else None
 
+    # Priority queue of (negated directory score, depth, relative path, absolute path).
+    # Ties on score go to shallower directories first (breadth-first), then alphabetically.
+    dir_queue = [(0, 0, '', abs_root_dir)]
     candidate_files = []
-    for root, dirs, files in os.walk(abs_root_dir, topdown=True):
+    while dir_queue:
+        if budget.is_exhausted():
+            budget.unexplored_dirs.extend(rel_dir or '.' for _, _, rel_dir, _ in dir_queue)
+            break
+
+        _, _, _, root = heapq.heappop(dir_queue)
+        listing = next(os.walk(root, topdown=True), None)
+        if listing is None:
+            continue
+        _, dirs, files = listing
+
         depth = root[len(abs_root_dir) + len(os.path.sep):].count(os.path.sep)
         if depth >= max_depth:
-            dirs[:] = []
             continue
 
-        dirs[:] = [d for d in dirs if not exclude_spec.match_file(os.path.relpath(os.path.join(root, d), abs_root_dir).replace(os.sep, '/'))]
+        # A directory is always scanned before its subtree, so its .gitignore
+        # can be loaded here instead of walking the whole tree up front.
+        if '.gitignore' in files:
+            gitignore_patterns = load_gitignore_patterns(abs_root_dir, root)
+            if gitignore_patterns:
+                all_exclude_patterns += gitignore_patterns
+                exclude_spec = PathSpec.from_lines('gitwildmatch', all_exclude_patterns)
+
+        for d in dirs:
+            # Like os.walk, never follow directory symlinks: they can leave the project or loop forever
+            if os.path.islink(os.path.join(root, d)):
+                continue
+            rel_dir = os.path.relpath(os.path.join(root, d), abs_root_dir).replace(os.sep, '/')
+            if exclude_spec.match_file(rel_dir):
+                continue
+            # Skip directories whose whole subtree is excluded, unless --include or a negated
+            # exclude pattern (e.g. "build/*" then "!build/keep.py") could re-add files from it
+            if exclude_spec.match_file(rel_dir + '/'):
+                negated_patterns = [p[1:] for p in all_exclude_patterns if p.startswith('!')]
+                if not patterns_may_match_under(include_patterns + negated_patterns, rel_dir):
+                    continue
+            heapq.heappush(dir_queue, (-calculate_directory_score(rel_dir), rel_dir.count('/') + 1, rel_dir, os.path.join(root, d)))
         
         for file in files:
+            # Stop straight away rather than matching the rest of a possibly huge directory
+            if budget.is_exhausted():
+                budget.partially_explored_dirs.append(os.path.relpath(root, abs_root_dir).replace(os.sep, '/'))
+                break
+
             full_path = os.path.join(root, file)
             relative_path = os.path.relpath(full_path, abs_root_dir).replace(os.sep, '/')
 
@@ -76,15 +145,28 @@ def get_all_files(root_dir, include_patterns, exclude_patterns, focus_patterns,
                 # NEW: Check if the file is binary.
                 is_binary = is_binary_file(full_path)
                 size = 0 if is_binary else os.path.getsize(full_path)
-                
-                score = calculate_importance_score(relative_path)
-                if focus_spec and focus_spec.match_file(relative_path):
-                    score += 1000
-                    
-                candidate_files.append({"path": full_path, "size": size, "score": score, "is_binary": is_binary})
             except OSError:
                 continue
 
+            # Too big for what is left of the byte budget: skip it, smaller files may still fit
+            if not budget.charge(size):
+                budget.omitted_files.append(relative_path)
+                continue
+                
+            score = calculate_importance_score(relative_path)
+            if focus_spec and focus_spec.match_file(relative_path):
+                score += 1000
+                
+            candidate_files.append({"path": full_path, "size": size, "score": score, "is_binary": is_binary})
+
+    skipped = (f"{len(budget.unexplored_dirs)} directories unexplored, "
+               f"{len(budget.partially_explored_dirs)} partially explored, "
+               f"{len(budget.omitted_files)} files omitted")
+    if budget.exhausted_reason:
+        print(f"Warning: Stopped scanning after exhausting the {budget.exhausted_reason}; {skipped}.")
+    elif budget.omitted_files:
+        print(f"Warning: Some files did not fit in the scan byte budget; {skipped}.")
+
     candidate_files.sort(key=lambda x: x["score"], reverse=True)
 
     final_files = []
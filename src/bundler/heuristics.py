@@ -25,13 +25,23 @@ def calculate_importance_score(relative_path):
     if extension in EXTENSION_SCORES:
         score += EXTENSION_SCORES[extension]
             
-    # 3. Score based on directory names
-    for part in path_parts[:-1]:
+    # 3. Score based on directory names, with a small penalty for depth
+    score += calculate_directory_score('/'.join(path_parts[:-1]))
+    
+    return score
+
+def calculate_directory_score(relative_dir):
+    """
+    Scores a directory by its names and depth. Used both for file scores and
+    to decide which directories get scanned first.
+    """
+    if relative_dir in ('', '.'):
+        return 0
+
+    path_parts = relative_dir.lower().split('/')
+    score = 0
+    for part in path_parts:
         if part in DIR_SCORES:
             score += DIR_SCORES[part]
-            
-    # 4. Apply a small penalty for depth
-    depth = len(path_parts) - 1
-    score -= depth
-    
-    return score
\ No newline at end of file
+
+    return score - len(path_parts)
\ No newline at end of file
@@ -1,7 +1,7 @@
 # src/main.py (Updated with --output-format)
 import sys, os, datetime, argparse, shutil, time, stat, re, json
 from bundler.core import bundle_project
-from bundler.config import MAX_TOTAL_FILES, MAX_DIRECTORY_DEPTH
+from bundler.config import MAX_TOTAL_FILES, MAX_TOTAL_SIZE_MB, MAX_DIRECTORY_DEPTH
 try:
     from cloner import CACHE_DIR, handle_repo_url
 except ImportError:
@@ -46,6 +46,12 @@ def parse_size(size_str):
     if unit == 'g': return value * 1024 * 1024 * 1024
     return value
 
+def parse_seconds(seconds_str):
+    try: value = float(seconds_str)
+    except ValueError: raise argparse.ArgumentTypeError("Invalid time format. Use a number of seconds, e.g. '30' or '2.5'.")
+    if value <= 0: raise argparse.ArgumentTypeError("Time budget must be greater than 0 seconds.")
+    return value
+
 def run():
     parser = argparse.ArgumentParser(description="Rosetta Assembler: A context bundler for AI development.", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument("project_path", type=str, nargs='?', default=None, help="The path to the project directory or URL.")
@@ -57,6 +63,8 @@ def run():
     parser.add_argument("--target-size", type=parse_size, default="750k", help="Target size for the bundle (e.g., '750k', '10M').")
     parser.add_argument("--max-files", type=int, default=MAX_TOTAL_FILES, help="Maximum number of files to include.")
     parser.add_argument("--max-depth", type=int, default=MAX_DIRECTORY_DEPTH, help="Maximum directory depth to scan.")
+    parser.add_argument("--time-budget", type=parse_seconds, default=None, help="Stop scanning after this many seconds and bundle the best files found so far.")
+    parser.add_argument("--scan-byte-budget", type=parse_size, default=f"{MAX_TOTAL_SIZE_MB}m", help="Stop scanning after this much file content (e.g., '500m', '2g'). Use 0 for no limit.")
     parser.add_argument("--clear-cache", action="store_true", help="Clear the cache of cloned repositories.")
     args = parser.parse_args()
 
@@ -88,7 +96,9 @@ def run():
         target_size_bytes=args.target_size,
         max_files=args.max_files,
         max_depth=args.max_depth,
-        output_format=args.output_format # Pass the format to the bundler
+        output_format=args.output_format, # Pass the format to the bundler
+        time_budget_seconds=args.time_budget,
+        scan_byte_budget=args.scan_byte_budget
     )
     if args.output:
         initial_filepath = args.output
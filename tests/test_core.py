@@ -0,0 +1,77 @@
+# tests/test_core.py
+import time
+import pytest
+from unittest.mock import patch
+
+from bundler import core
+from bundler.core import bundle_project
+
+@pytest.fixture
+def project(tmp_path):
+    """A small real project, scanned in order: root, src/, tests/, data/."""
+    (tmp_path / "README.md").write_text("readme")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('main')")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_main.py").write_text("def test(): pass")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "rows.csv").write_text("a,b")
+    return tmp_path
+
+def bundle(project_path, output_format='txt', **budgets):
+    return bundle_project(
+        project_path=str(project_path),
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10,
+        output_format=output_format, **budgets
+    )
+
+def test_no_scan_report_within_budget(project):
+    """Verify bundles that stay within budget are unchanged."""
+    assert "# Scan Report" not in bundle(project, time_budget_seconds=60)
+    assert "scanReport" not in bundle(project, output_format='json')
+
+def test_txt_scan_report(project):
+    """
+    Verify the txt bundle ends with a scan report once the byte budget is spent.
+    Root (README 6) and src (main.py 13) use it up, so tests/ and data/ are never reached.
+    """
+    output = bundle(project, scan_byte_budget=19)
+    assert "--- START OF FILE src/main.py ---" in output
+    report = output.split("# Scan Report")[1]
+    assert "Stopped early: scan byte budget exhausted after scanning 19 bytes." in report
+    assert "Unexplored directories:\n- data\n- tests\nPartially explored directories:\nOmitted files:" in report
+
+def test_json_scan_report(project):
+    """Verify the json bundle carries the scan report under "scanReport"."""
+    output = bundle(project, output_format='json', scan_byte_budget=19)
+    assert [f["path"] for f in output["files"]] == ["src/main.py", "README.md"]
+    assert output["scanReport"] == {
+        "reason": "scan byte budget",
+        "bytesScanned": 19,
+        "unexploredDirectories": ["data", "tests"],
+        "partiallyExploredDirectories": [],
+        "omittedFiles": [],
+    }
+
+def test_txt_scan_report_for_skipped_files(project):
+    """Verify files too big for the byte budget are reported even if the budget is never used up."""
+    output = bundle(project, scan_byte_budget=20)
+    report = output.split("# Scan Report")[1]
+    assert "Scanned 19 bytes; some files did not fit in the scan byte budget." in report
+    assert "Omitted files:\n- data/rows.csv\n- tests/test_main.py" in report
+
+def test_content_omitted_past_deadline(project):
+    """Verify files selected during the scan have their content omitted once the deadline passes."""
+    core_get_all_files = core.get_all_files
+
+    def expire_after_scan(**kwargs):
+        selected = core_get_all_files(**kwargs)
+        kwargs["budget"].deadline = time.monotonic() - 1
+        return selected
+
+    with patch('bundler.core.get_all_files', side_effect=expire_after_scan):
+        output = bundle(project, output_format='json', time_budget_seconds=60)
+    assert all(f["content"] == "[Content omitted: time budget exhausted]" for f in output["files"])
+    assert output["scanReport"]["reason"] == "time budget"
+    assert output["scanReport"]["omittedFiles"] == ["README.md", "data/rows.csv", "src/main.py", "tests/test_main.py"]
@@ -1,10 +1,14 @@
 # tests/test_file_handler.py (Final Corrected Patch)
 import os
+import time
 import pytest
 from unittest.mock import patch
 import posixpath # Import for explicit POSIX path manipulation
 
-from bundler.file_handler import get_all_files
+from bundler.budget import ScanBudget
+from bundler.config import MAX_REPORT_ENTRIES
+from bundler import file_handler
+from bundler.file_handler import get_all_files, load_gitignore_patterns, patterns_may_match_under
 
 @pytest.fixture
 def mock_filesystem():
@@ -49,11 +53,15 @@ def mock_filesystem():
     # Use patch.multiple to replace all necessary os and os.path functions
     # with their POSIX equivalents. This is the key to making the test stable.
     # CRITICAL: We must also mock `is_binary_file` so it doesn't try to access the fake paths.
+    # Directories are listed one level at a time, so only yield the entry for the requested path.
+    def walk_side_effect(path, topdown=True):
+        return iter([entry for entry in walk_data if entry[0] == path])
+
     with patch.multiple('os',
-        walk=lambda path, topdown=True: walk_data,
+        walk=walk_side_effect,
         sep=posixpath.sep
     ), patch.multiple('os.path',
-        abspath=lambda path: base,
+        abspath=posixpath.normpath,
         join=posixpath.join,
         relpath=posixpath.relpath,
         getsize=getsize_side_effect
@@ -104,4 +112,257 @@ def test_focus_on_with_target_size(mock_filesystem):
     assert len(result_files) == 3
     paths = {posixpath.basename(info['path']) for info in result_files}
     assert {"README.md", "guide.md", "settings.toml"} == paths
-    assert "main.py" not in paths
\ No newline at end of file
+    assert "main.py" not in paths
+
+def test_byte_budget_reports_unexplored(mock_filesystem):
+    """
+    Verify scanning stops once the byte budget is spent and reports what was skipped.
+    Scan order is root (README 100), app (main.py 500, utils.py 300 is skipped as too big),
+    then config (settings.toml 50), which uses up the budget before docs.
+    """
+    budget = ScanBudget(byte_budget=650)
+    result_files = get_all_files(
+        root_dir="/fake/project",
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+    )
+    paths = {posixpath.basename(info['path']) for info in result_files}
+    assert {"README.md", "main.py", "settings.toml"} == paths
+    report = budget.report()
+    assert report["reason"] == "scan byte budget"
+    assert report["unexploredDirectories"] == ["docs"]
+    assert report["omittedFiles"] == ["app/utils.py"]
+
+def test_time_budget_exhausted_upfront(mock_filesystem):
+    """Verify an expired deadline yields an empty bundle with the root left unexplored."""
+    budget = ScanBudget(time_budget_seconds=0)
+    result_files = get_all_files(
+        root_dir="/fake/project",
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+    )
+    assert result_files == []
+    assert budget.report()["unexploredDirectories"] == ["."]
+
+def test_no_report_within_budget(mock_filesystem):
+    """Verify a generous budget changes nothing and produces no report."""
+    budget = ScanBudget(time_budget_seconds=60, byte_budget=10000)
+    result_files = get_all_files(
+        root_dir="/fake/project",
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+    )
+    assert len(result_files) == 5
+    assert budget.report() is None
+
+def test_zero_byte_budget_is_unlimited(mock_filesystem):
+    """Verify a byte budget of 0 disables the limit instead of omitting every file."""
+    budget = ScanBudget(byte_budget=0)
+    result_files = get_all_files(
+        root_dir="/fake/project",
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+    )
+    assert len(result_files) == 5
+    assert budget.report() is None
+
+def test_directory_symlinks_not_followed(tmp_path):
+    """Verify symlinked directories are skipped, so nothing outside the project or in a loop is bundled."""
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret.txt").write_text("secret")
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    (project / "src" / "a.py").write_text("print('a')")
+    (project / "src" / "loop").symlink_to(project, target_is_directory=True)
+    (project / "outside_link").symlink_to(outside, target_is_directory=True)
+
+    result_files = get_all_files(
+        root_dir=str(project),
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=1000, max_depth=10
+    )
+    paths = [os.path.relpath(info['path'], project).replace(os.sep, '/') for info in result_files]
+    assert paths == ["src/a.py"]
+
+def test_load_gitignore_patterns_relative_to_root(tmp_path):
+    """Verify patterns from a sub-gitignore are prefixed with that directory."""
+    (tmp_path / ".gitignore").write_text("# comment\n*.log\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / ".gitignore").write_text("out/*\n!out/keep.txt\n")
+
+    assert load_gitignore_patterns(str(tmp_path), str(tmp_path)) == ["*.log"]
+    assert load_gitignore_patterns(str(tmp_path), str(tmp_path / "sub")) == ["sub/out/*", "!sub/out/keep.txt"]
+
+def test_nested_gitignores_loaded_during_scan(tmp_path):
+    """
+    Verify each .gitignore applies to its own subtree, and that the .gitignore
+    of a directory excluded by its parent is never read.
+    """
+    (tmp_path / ".gitignore").write_text("vendor/\n")
+    (tmp_path / "main.py").write_text("main")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / ".gitignore").write_text("generated.py\n")
+    (tmp_path / "src" / "app.py").write_text("app")
+    (tmp_path / "src" / "generated.py").write_text("generated")
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "vendor" / ".gitignore").write_text("*\n")
+    (tmp_path / "vendor" / "lib.py").write_text("lib")
+
+    with patch('bundler.file_handler.load_gitignore_patterns', wraps=file_handler.load_gitignore_patterns) as loader:
+        result_files = get_all_files(
+            root_dir=str(tmp_path),
+            include_patterns=[], exclude_patterns=[], focus_patterns=[],
+            target_size_bytes=None, max_files=100, max_depth=10
+        )
+    paths = {os.path.relpath(info['path'], tmp_path).replace(os.sep, '/') for info in result_files}
+    assert paths == {".gitignore", "main.py", "src/.gitignore", "src/app.py"}
+    read_dirs = {os.path.relpath(call.args[1], tmp_path) for call in loader.call_args_list}
+    assert read_dirs == {".", "src"}
+
+def test_priority_dirs_scanned_before_wide_low_priority_dirs(tmp_path):
+    """Verify src/ is scanned before a wide data/ tree, so a tight budget still bundles src/main.py."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("x" * 10)
+    for i in range(50):
+        (tmp_path / "data" / f"d{i}").mkdir(parents=True)
+        (tmp_path / "data" / f"d{i}" / "row.csv").write_text("y" * 10)
+
+    budget = ScanBudget(byte_budget=10)
+    result_files = get_all_files(
+        root_dir=str(tmp_path),
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+    )
+    paths = [os.path.relpath(info['path'], tmp_path).replace(os.sep, '/') for info in result_files]
+    assert paths == ["src/main.py"]
+    assert budget.report()["reason"] == "scan byte budget"
+
+def test_patterns_may_match_under():
+    """Verify only include patterns that could reach inside a directory keep it from being pruned."""
+    assert patterns_may_match_under(["*.js"], "node_modules")
+    assert patterns_may_match_under(["main.py"], "node_modules")
+    assert patterns_may_match_under(["**/keep.js"], "node_modules")
+    assert patterns_may_match_under(["node_modules/pkg/index.js"], "node_modules")
+    assert patterns_may_match_under(["node_*/pkg/*.js"], "node_modules")
+    assert not patterns_may_match_under(["src/*.py"], "node_modules")
+    assert not patterns_may_match_under(["/docs/guide.md", "!node_modules/x.js"], "node_modules")
+
+def test_excluded_dirs_pruned_unless_included(tmp_path):
+    """Verify excluded directories are skipped, but still scanned when --include reaches into them."""
+    (tmp_path / "main.py").write_text("main")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "index.js").write_text("index")
+
+    def scanned_dirs(include_patterns):
+        with patch('os.walk', wraps=os.walk) as walker:
+            result_files = get_all_files(
+                root_dir=str(tmp_path),
+                include_patterns=include_patterns, exclude_patterns=[], focus_patterns=[],
+                target_size_bytes=None, max_files=100, max_depth=10
+            )
+        paths = {os.path.relpath(info['path'], tmp_path).replace(os.sep, '/') for info in result_files}
+        return paths, {os.path.relpath(call.args[0], tmp_path) for call in walker.call_args_list}
+
+    paths, dirs = scanned_dirs(["src/*.py", "/main.py"])
+    assert paths == {"main.py"}
+    assert dirs == {"."}
+
+    paths, dirs = scanned_dirs(["node_modules/index.js"])
+    assert paths == {"node_modules/index.js"}
+    assert "node_modules" in dirs
+
+def test_equal_priority_dirs_scanned_breadth_first(tmp_path):
+    """Verify directories with equal scores are scanned shallowest first, not alphabetically."""
+    (tmp_path / "a" / "src").mkdir(parents=True)
+    (tmp_path / "a" / "src" / "deep.py").write_text("deep")
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "shallow.py").write_text("shallow")
+
+    with patch('bundler.file_handler.calculate_directory_score', return_value=0):
+        budget = ScanBudget(byte_budget=len("shallow"))
+        result_files = get_all_files(
+            root_dir=str(tmp_path),
+            include_patterns=[], exclude_patterns=[], focus_patterns=[],
+            target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+        )
+    paths = [os.path.relpath(info['path'], tmp_path).replace(os.sep, '/') for info in result_files]
+    assert paths == ["b/shallow.py"]
+    assert budget.report()["unexploredDirectories"] == ["a/src"]
+
+def test_negated_excludes_keep_directory_scanned(tmp_path):
+    """
+    Verify the "dir/*" then "!dir/file" idiom still includes the re-added file,
+    both from a .gitignore and from --exclude.
+    """
+    (tmp_path / ".gitignore").write_text("build/*\n!build/keep.py\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "keep.py").write_text("keep")
+    (tmp_path / "build" / "out.o").write_text("out")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "keep.md").write_text("keep")
+    (tmp_path / "docs" / "other.md").write_text("other")
+
+    result_files = get_all_files(
+        root_dir=str(tmp_path),
+        include_patterns=[], exclude_patterns=["docs/**", "!docs/keep.md"], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10
+    )
+    paths = {os.path.relpath(info['path'], tmp_path).replace(os.sep, '/') for info in result_files}
+    assert paths == {".gitignore", "build/keep.py", "docs/keep.md"}
+
+def test_oversized_file_skipped_without_ending_scan(tmp_path, capsys):
+    """Verify one file larger than the byte budget is skipped while the rest of the scan carries on."""
+    (tmp_path / "dump.sql").write_text("x" * 2000)
+    (tmp_path / "README.md").write_text("hi")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('main')")
+
+    budget = ScanBudget(byte_budget=1000)
+    result_files = get_all_files(
+        root_dir=str(tmp_path),
+        include_patterns=[], exclude_patterns=[], focus_patterns=[],
+        target_size_bytes=None, max_files=100, max_depth=10, budget=budget
+    )
+    paths = {os.path.relpath(info['path'], tmp_path).replace(os.sep, '/') for info in result_files}
+    assert paths == {"README.md", "src/main.py"}
+    report = budget.report()
+    assert report["reason"] is None
+    assert report["unexploredDirectories"] == []
+    assert report["omittedFiles"] == ["dump.sql"]
+    assert "0 directories unexplored, 0 partially explored, 1 files omitted" in capsys.readouterr().out
+
+def test_deadline_stops_mid_directory(tmp_path, capsys):
+    """Verify the scan leaves a huge directory as soon as the deadline passes, with a short report."""
+    for i in range(5000):
+        (tmp_path / f"f{i}.py").write_text("x")
+
+    budget = ScanBudget(time_budget_seconds=60)
+    def expire_deadline(path):
+        budget.deadline = time.monotonic() - 1
+        return False
+
+    start = time.monotonic()
+    with patch('bundler.file_handler.is_binary_file', side_effect=expire_deadline) as sniffer:
+        result_files = get_all_files(
+            root_dir=str(tmp_path),
+            include_patterns=[], exclude_patterns=[], focus_patterns=[],
+            target_size_bytes=None, max_files=10000, max_depth=10, budget=budget
+        )
+    assert time.monotonic() - start < 1
+    assert sniffer.call_count == 1
+    assert len(result_files) == 1
+    report = budget.report()
+    assert report["reason"] == "time budget"
+    assert report["partiallyExploredDirectories"] == ["."]
+    assert report["omittedFiles"] == []
+    assert "0 directories unexplored, 1 partially explored, 0 files omitted" in capsys.readouterr().out
+
+def test_scan_report_is_capped():
+    """Verify long lists in the scan report are cut to MAX_REPORT_ENTRIES plus a summary line."""
+    budget = ScanBudget()
+    budget.omitted_files = [f"src/f{i:03}.py" for i in range(MAX_REPORT_ENTRIES + 150)]
+    omitted = budget.report()["omittedFiles"]
+    assert len(omitted) == MAX_REPORT_ENTRIES + 1
+    assert omitted[0] == "src/f000.py"
+    assert omitted[-1] == "... and 150 more"